@@ -1,6 +1,6 @@
 # Module for vector similarity search tool in Azure AI Projects:
 # - Authenticates via Azure DefaultAzureCredential
-# - Generates text embeddings for the query using Azure AI Inference
+# - Generates text embeddings for the query using Azure AI Inference (via the embedding cache)
 # - Queries Cosmos DB vector index for similar code snippets
 # - Returns results as a JSON string
 import json
@@ -10,7 +10,7 @@ from urllib.parse import urlparse
 from azure.identity.aio import DefaultAzureCredential
 from azure.ai.projects.aio import AIProjectClient
 from azure.ai.inference.aio import EmbeddingsClient
-from data import cosmos_ops
+from data import cosmos_ops, embedding_cache
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
@@ -51,46 +51,48 @@ async def vector_search(query: str, k: int = 30, project_id: str = "default-proj
         project_endpoint = os.environ["PROJECT_CONNECTION_STRING"]
         inference_endpoint = f"https://{urlparse(project_endpoint).netloc}/models"
         
-        logger.info("Creating embeddings client")
-        async with EmbeddingsClient(
-            endpoint=inference_endpoint,
-            credential=DefaultAzureCredential(),
-            credential_scopes=["https://ai.azure.com/.default"],
-        ) as embeddings_client:
-            # Create an embeddings client from the AI project
-            logger.info("Generating embeddings for query using model: %s", model_deployment_name)
-            # Generate embeddings for the input query
-            response = await embeddings_client.embed(
-                model=model_deployment_name,
-                input=[query]
-            )
+        # Reuse a cached embedding for repeated queries
+        query_vector = await embedding_cache.get_embedding(query, model_deployment_name, normalize=True, shared=True)
+        if query_vector:
+            logger.info("Using cached embedding vector of length: %d", len(query_vector))
+        else:
+            logger.info("Creating embeddings client")
+            async with EmbeddingsClient(
+                endpoint=inference_endpoint,
+                credential=DefaultAzureCredential(),
+                credential_scopes=["https://ai.azure.com/.default"],
+            ) as embeddings_client:
+                # Create an embeddings client from the AI project
+                logger.info("Generating embeddings for query using model: %s", model_deployment_name)
+                # Generate embeddings for the input query
+                response = await embeddings_client.embed(
+                    model=model_deployment_name,
+                    input=[query]
+                )
 
-            # Ensure the embedding was generated successfully
-            if not response.data or not response.data[0].embedding:
-                logger.error("Failed to generate embedding. Response data: %s", response)
-                raise ValueError("Failed to generate embedding.")
+                # Ensure the embedding was generated successfully
+                if not response.data or not response.data[0].embedding:
+                    logger.error("Failed to generate embedding. Response data: %s", response)
+                    raise ValueError("Failed to generate embedding.")
 
-            # Extract the embedding vector and ensure it's a list of floats
-            query_vector = [float(x) for x in response.data[0].embedding]
-            logger.info("Successfully generated embedding vector of length: %d", len(query_vector))
+                # Extract the embedding vector and ensure it's a list of floats
+                query_vector = [float(x) for x in response.data[0].embedding]
+                logger.info("Successfully generated embedding vector of length: %d", len(query_vector))
+            await embedding_cache.put_embedding(query, model_deployment_name, query_vector, normalize=True, shared=True)
 
-            # Perform vector search in Cosmos DB with the generated embedding
-            logger.info("Querying Cosmos DB for similar snippets")
-            results = await cosmos_ops.query_similar_snippets(
-                query_vector=query_vector,
-                project_id=project_id,
-                k=k
-            )
-            logger.info("Found %d similar snippets", len(results))
+        # Perform vector search in Cosmos DB with the generated embedding
+        logger.info("Querying Cosmos DB for similar snippets")
+        results = await cosmos_ops.query_similar_snippets(
+            query_vector=query_vector,
+            project_id=project_id,
+            k=k
+        )
+        logger.info("Found %d similar snippets", len(results))
 
-            # Return the search results as a JSON string
-            return json.dumps(results)
+        # Return the search results as a JSON string
+        return json.dumps(results)
 
     except Exception as e:
         # Log any errors and return an error payload
         logger.error("Vector search failed with error: %s", str(e), exc_info=True)
-        return json.dumps({"error": str(e)})
-    finally:
-        # Close Cosmos DB connections to clean up resources
-        logger.info("Closing Cosmos DB connections")
-        await cosmos_ops.close_connections() 
\ No newline at end of file
+        return json.dumps({"error": str(e)})
\ No newline at end of file
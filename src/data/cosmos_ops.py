@@ -3,6 +3,7 @@
 # - Configure container with vector index for embeddings
 # - Upsert and retrieve code snippet documents with embeddings
 # - Perform vector similarity search using DiskANN index
+# - Read and write cached embeddings in a separate embedding cache container
 
 import os
 import logging
@@ -20,12 +21,15 @@ logger = logging.getLogger(__name__)
 COSMOS_DATABASE_NAME = os.environ.get("COSMOS_DATABASE_NAME", "dev-snippet-db")
 COSMOS_CONTAINER_NAME = os.environ.get("COSMOS_CONTAINER_NAME", "code-snippets")
 COSMOS_VECTOR_TOP_K = int(os.environ.get("COSMOS_VECTOR_TOP_K", "30"))
+EMBEDDING_CACHE_CONTAINER_NAME = os.environ.get("EMBEDDING_CACHE_CONTAINER_NAME", "embedding-cache")
+EMBEDDING_CACHE_TTL_SECONDS = int(os.environ.get("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
 
 # Singleton references for client, database, and container caching
 # This ensures we reuse connections across calls
 _cosmos_client = None
 _database = None
 _container = None
+_embedding_cache_container = None
 
 # Gets or creates the singleton Cosmos client, caching it for reuse
 async def get_cosmos_client():
@@ -114,17 +118,47 @@ async def get_container():
     return _container
 
 
-# Closes all Cosmos DB connections and resets cached client, database, and container
+# Gets or creates the embedding cache container, partitioned on /id
+# Each document maps a text hash to a previously generated embedding and expires
+# after EMBEDDING_CACHE_TTL_SECONDS (applied when the container is created)
+async def get_embedding_cache_container():
+    """
+    Gets or creates the singleton embedding cache container.
+    
+    Returns:
+        The container client
+        
+    Raises:
+        Exception: If container creation fails
+    """
+    global _embedding_cache_container
+    if _embedding_cache_container is None:
+        try:
+            logger.info(f"Getting container '{EMBEDDING_CACHE_CONTAINER_NAME}' from database '{COSMOS_DATABASE_NAME}'")
+            database = await get_database()
+            _embedding_cache_container = await database.create_container_if_not_exists(
+                id=EMBEDDING_CACHE_CONTAINER_NAME,
+                partition_key=PartitionKey(path="/id"),
+                default_ttl=EMBEDDING_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.error(f"Error configuring embedding cache container: {str(e)}", exc_info=True)
+            raise
+    return _embedding_cache_container
+
+
+# Closes all Cosmos DB connections and resets cached client, database, and containers
 async def close_connections():
     """
     Closes all Cosmos DB connections.
     """
-    global _cosmos_client, _database, _container
+    global _cosmos_client, _database, _container, _embedding_cache_container
     if _cosmos_client is not None:
         await _cosmos_client.close()
         _cosmos_client = None
         _database = None
         _container = None
+        _embedding_cache_container = None
         logger.info("Closed Cosmos DB connections")
 
 
@@ -338,4 +372,38 @@ async def query_similar_snippets(
         return results
     except Exception as e:
         logger.error(f"Error in vector similarity search: {str(e)}", exc_info=True)
-        raise 
\ No newline at end of file
+        raise
+
+
+# Reads a cached embedding by its text hash (id and partition key)
+# Returns the embedding vector or None if not cached
+async def get_cached_embedding(key: str) -> list[float] | None:
+    """
+    Gets a cached embedding from the embedding cache container.
+    
+    Args:
+        key: The hash of the normalized input text
+        
+    Returns:
+        The cached embedding vector or None if not found
+    """
+    container = await get_embedding_cache_container()
+    try:
+        item = await container.read_item(item=key, partition_key=key)
+    except CosmosResourceNotFoundError:
+        return None
+    return item.get("embedding")
+
+
+# Stores an embedding in the cache container keyed by its text hash
+async def upsert_cached_embedding(key: str, embedding: list[float], model: str) -> None:
+    """
+    Upserts an embedding into the embedding cache container.
+    
+    Args:
+        key: The hash of the normalized input text
+        embedding: The embedding vector
+        model: The embedding model deployment that produced the vector
+    """
+    container = await get_embedding_cache_container()
+    await container.upsert_item(body={"id": key, "model": model, "embedding": embedding})
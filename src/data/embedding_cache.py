@@ -0,0 +1,110 @@
+# Module for caching text embeddings in front of the embedding model:
+# - Keys inputs by a SHA-256 hash of the model name and text (optionally normalized)
+# - L1: bounded in-process LRU, private to each worker
+# - L2: Cosmos DB embedding cache container, shared across instances; opt-in per
+#   call (search queries) since ingested code rarely repeats and its vector is
+#   already stored with the snippet
+# - Cache failures are logged and treated as misses so embedding never breaks
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+from data import cosmos_ops
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Maximum number of embeddings kept in the in-process cache
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "4096"))
+
+# In-process LRU of cache key -> embedding vector
+_memory_cache: OrderedDict[str, list[float]] = OrderedDict()
+
+
+def cache_key(text: str, model: str, *, normalize: bool = False) -> str:
+    """
+    Builds the cache key for a text/model pair.
+
+    With normalize=True the text is lowercased and whitespace-collapsed so
+    trivially different search queries share an entry; code must be keyed on
+    its exact text since case and indentation are meaningful there. The model
+    is part of the key so switching deployments never returns vectors from
+    another model.
+    """
+    if normalize:
+        text = " ".join(text.split()).lower()
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, embedding: list[float]) -> None:
+    """Adds an embedding to the in-process cache, evicting the least recently used entry."""
+    _memory_cache[key] = embedding
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > EMBEDDING_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+# Looks up an embedding in memory first, then (if shared) in Cosmos DB
+# Returns None on a miss or if the Cosmos lookup fails
+async def get_embedding(
+    text: str, model: str, *, normalize: bool = False, shared: bool = False
+) -> list[float] | None:
+    """
+    Gets a cached embedding for the given text and model.
+
+    Args:
+        text: The input text
+        model: The embedding model deployment name
+        normalize: Whether to key on the normalized text (search queries only)
+        shared: Whether to fall back to the Cosmos DB cache on a memory miss
+
+    Returns:
+        The cached embedding vector or None if not cached
+    """
+    key = cache_key(text, model, normalize=normalize)
+    embedding = _memory_cache.get(key)
+    if embedding is not None:
+        _memory_cache.move_to_end(key)
+        logger.debug(f"Embedding cache hit (memory) for key {key}")
+        return embedding
+
+    if not shared:
+        return None
+
+    try:
+        embedding = await cosmos_ops.get_cached_embedding(key)
+    except Exception as e:
+        logger.warning(f"Embedding cache lookup failed: {str(e)}")
+        return None
+
+    if embedding:
+        logger.debug(f"Embedding cache hit (cosmos) for key {key}")
+        _remember(key, embedding)
+        return embedding
+    return None
+
+
+# Stores a freshly generated embedding in memory and (if shared) in Cosmos DB
+async def put_embedding(
+    text: str, model: str, embedding: list[float], *, normalize: bool = False, shared: bool = False
+) -> None:
+    """
+    Caches an embedding for the given text and model.
+
+    Args:
+        text: The input text
+        model: The embedding model deployment name
+        embedding: The embedding vector generated for the text
+        normalize: Whether to key on the normalized text (search queries only)
+        shared: Whether to also write the embedding to the Cosmos DB cache
+    """
+    key = cache_key(text, model, normalize=normalize)
+    _remember(key, embedding)
+    if not shared:
+        return
+    try:
+        await cosmos_ops.upsert_cached_embedding(key, embedding, model)
+    except Exception as e:
+        logger.warning(f"Embedding cache store failed: {str(e)}")
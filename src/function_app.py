@@ -21,71 +21,74 @@
 # - HTTP endpoints for traditional API access
 # - MCP tools for AI assistant integration
 
-import json
+import asyncio
+import importlib
+import importlib.util
 import logging
+import os
+import time
 import azure.functions as func
+import orjson
 from datetime import datetime, timezone
 
-app = func.FunctionApp()
-
-# Register blueprints with enhanced error handling to prevent startup issues
+# Configure logging for this module
+logger = logging.getLogger(__name__)
 
-# Core snippy functionality
+# Storage SDK import used by the extended health check; a missing optional dependency
+# should degrade that check rather than prevent the app from starting
 try:
-    from functions import bp_snippy
-    app.register_blueprint(bp_snippy.bp)
-    logging.info("✅ Snippy blueprint registered successfully")
+    from azure.storage.blob.aio import BlobServiceClient
 except ImportError as e:
-    logging.error(f"❌ Import error for Snippy blueprint: {e}")
-except Exception as e:
-    logging.error(f"❌ Snippy blueprint registration failed: {e}")
+    BlobServiceClient = None
+    logger.error(f"❌ Import error for Azure Storage SDK: {e}")
 
-# Query functionality  
-try:
-    from routes import query
-    app.register_blueprint(query.bp)
-    logging.info("✅ Query blueprint registered successfully")
-except ImportError as e:
-    logging.error(f"❌ Import error for Query blueprint: {e}")
-except Exception as e:
-    logging.error(f"❌ Query blueprint registration failed: {e}")
-
-# Embeddings functionality - now enabled for Level 2
-try:
-    from functions import bp_embeddings
-    app.register_blueprint(bp_embeddings.bp)
-    logging.info("✅ Embeddings blueprint registered successfully")
-except ImportError as e:
-    logging.error(f"❌ Import error for Embeddings blueprint: {e}")
-except Exception as e:
-    logging.error(f"❌ Embeddings blueprint registration failed: {e}")
+app = func.FunctionApp()
 
-# Ingestion functionality - blob trigger for Level 4
-try:
-    from functions import bp_ingestion
-    app.register_blueprint(bp_ingestion.bp)
-    logging.info("✅ Ingestion blueprint registered successfully")
-except ImportError as e:
-    logging.error(f"❌ Import error for Ingestion blueprint: {e}")
-except Exception as e:
-    logging.error(f"❌ Ingestion blueprint registration failed: {e}")
+# Blueprint modules keyed by a human-readable name used in log messages
+BLUEPRINT_MODULES = {
+    "Snippy": "functions.bp_snippy",                # Core snippy functionality
+    "Query": "routes.query",                        # Query functionality
+    "Embeddings": "functions.bp_embeddings",        # Embeddings functionality - now enabled for Level 2
+    "Ingestion": "functions.bp_ingestion",          # Ingestion functionality - blob trigger for Level 4
+    "Multi-agent": "functions.bp_multi_agent",      # Multi-agent functionality
+}
 
-# Multi-agent functionality
-try:
-    from functions import bp_multi_agent
-    app.register_blueprint(bp_multi_agent.bp)
-    logging.info("✅ Multi-agent blueprint registered successfully")
-except ImportError as e:
-    logging.error(f"❌ Import error for Multi-agent blueprint: {e}")
-except Exception as e:
-    logging.error(f"❌ Multi-agent blueprint registration failed: {e}")
+# Register blueprints with enhanced error handling to prevent startup issues
+_registered = []
+for _name, _module_path in BLUEPRINT_MODULES.items():
+    try:
+        # Probe for the module first so a blueprint that isn't shipped is
+        # skipped without executing any of its imports
+        if importlib.util.find_spec(_module_path) is None:
+            logger.warning("%s blueprint module '%s' not found, skipping", _name, _module_path)
+            continue
+        _module = importlib.import_module(_module_path)
+        app.register_blueprint(_module.bp)
+        _registered.append(_name)
+        logger.debug("✅ %s blueprint registered successfully", _name)
+    except Exception as e:
+        # ImportError included; the exception type tells the two cases apart
+        logger.error(f"❌ {_name} blueprint registration failed ({type(e).__name__}): {e}")
+if _registered:
+    logger.info("✅ Registered blueprints: %s", ", ".join(_registered))
+else:
+    logger.error("❌ No blueprints registered; only the health endpoints are available")
 
 
 # =============================================================================
 # HEALTH CHECK FUNCTIONALITY
 # =============================================================================
 
+# Static bodies for the health checks, serialized once at import time; the
+# bare error body is the fallback when the exception message can't be encoded
+_HEALTH_OK_BODY = b'{"status": "ok"}'
+_HEALTH_ERROR_BODY = b'{"status": "error"}'
+
+
 # HTTP endpoint for health check
+# Kept async on purpose: the Python worker runs sync handlers on its thread pool
+# executor, which costs more per request than awaiting a coroutine that never
+# suspends on the worker's event loop.
 @app.route(route="health", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 async def http_health_check(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -94,20 +97,38 @@ async def http_health_check(req: func.HttpRequest) -> func.HttpResponse:
     Returns:
         JSON response with status "ok" and 200 status code
     """
-    try:
-        logging.info("Health check endpoint called")
-        return func.HttpResponse(
-            body=json.dumps({"status": "ok"}),
-            mimetype="application/json",
-            status_code=200
-        )
-    except Exception as e:
-        logging.error(f"Error in health check: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({"status": "error", "message": str(e)}),
-            mimetype="application/json",
-            status_code=500
-        )
+    return func.HttpResponse(
+        body=_HEALTH_OK_BODY,
+        mimetype="application/json",
+        status_code=200
+    )
+
+
+# How long an extended health result is served from memory before the
+# storage and Cosmos probes run again; 0 disables caching
+HEALTH_TTL_SECONDS = float(os.environ.get("HEALTH_TTL_SECONDS", "5"))
+
+# Storage settings for the extended health check, read once per worker
+_STORAGE_CONNECTION = os.environ.get("AzureWebJobsStorage")
+_INGESTION_CONTAINER = os.environ.get("INGESTION_CONTAINER", "snippet-inputs")
+
+# Per-probe time budgets (a larger one until a service's probe first succeeds,
+# since that probe also builds the clients), and how long a probe that blew its
+# budget is skipped; during a regional outage SDK retries would otherwise hold
+# every health request open
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_PROBE_TIMEOUT_SECONDS", "2"))
+HEALTH_FIRST_PROBE_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_FIRST_PROBE_TIMEOUT_SECONDS", "15"))
+HEALTH_CIRCUIT_OPEN_SECONDS = float(os.environ.get("HEALTH_CIRCUIT_OPEN_SECONDS", "30"))
+
+# Monotonic deadline until which each service's probe circuit stays open, and
+# the services whose probe has succeeded at least once on this worker
+_circuit_open_until: dict[str, float] = {}
+_probe_succeeded: set[str] = set()
+
+# Last extended health result as (monotonic time, JSON body, status code),
+# plus a lock so concurrent requests share a single refresh per TTL window
+_last_health: tuple[float, bytes, int] | None = None
+_health_refresh_lock = asyncio.Lock()
 
 
 # HTTP endpoint for health check
@@ -120,42 +141,182 @@ async def http_health_check_extended(req: func.HttpRequest) -> func.HttpResponse
     - Azure Storage connection and INGESTION_CONTAINER accessibility
     - Cosmos DB connection and database/container accessibility
     
+    Results are cached for HEALTH_TTL_SECONDS so probe floods from external
+    monitors don't turn into a burst of Azure round trips.
+    
     Returns:
         JSON response with detailed status information
     """
-    logging.info("Extended Health check endpoint called")
+    global _last_health
+    logger.debug("Extended Health check endpoint called")
+    
+    cached = _last_health
+    if cached is None or time.monotonic() - cached[0] >= HEALTH_TTL_SECONDS:
+        async with _health_refresh_lock:
+            # Another request may have refreshed the result while we waited
+            cached = _last_health
+            if cached is None or time.monotonic() - cached[0] >= HEALTH_TTL_SECONDS:
+                try:
+                    body, status_code = await _run_health_checks()
+                except Exception as e:
+                    return _health_error_response(e)
+                cached = _last_health = (time.monotonic(), body, status_code)
+    
+    return func.HttpResponse(
+        body=cached[1],
+        mimetype="application/json",
+        status_code=cached[2]
+    )
+
+
+def _health_error_response(e: Exception) -> func.HttpResponse:
+    """
+    Build the 500 response for an unexpected health check failure.
+    
+    Kept out of the handlers so the error body is only built when an error occurs.
+    """
+    logger.error("Error in health check", exc_info=e)
+    try:
+        body = orjson.dumps({"status": "error", "message": str(e)})
+    except Exception:
+        body = _HEALTH_ERROR_BODY
+    return func.HttpResponse(
+        body=body,
+        mimetype="application/json",
+        status_code=500
+    )
+
+
+async def _run_health_checks() -> tuple[bytes, int]:
+    """
+    Probe Azure Storage and Cosmos DB and build the extended health response.
+    
+    Returns:
+        Tuple of the JSON response body and the HTTP status code
+    """
+    # Check Azure Storage and Cosmos DB connections concurrently
+    storage_status, cosmos_status = await asyncio.gather(
+        _guarded_probe("storage", _check_storage_connection),
+        _guarded_probe("cosmos", _check_cosmos_connection),
+        return_exceptions=True
+    )
+    if isinstance(storage_status, Exception):
+        storage_status = {"healthy": False, "error": str(storage_status)}
+    if isinstance(cosmos_status, Exception):
+        cosmos_status = {"healthy": False, "error": str(cosmos_status)}
+    
+    # Determine overall health status
+    all_healthy = storage_status.get("healthy", False) and cosmos_status.get("healthy", False)
+    status_code = 200 if all_healthy else 503  # Service Unavailable when degraded
     
     health_status = {
-        "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "services": {}
+        "status": "healthy" if all_healthy else "degraded",
+        "timestamp": _cached_ts(),
+        "services": {
+            "storage": storage_status,
+            "cosmos": cosmos_status
+        }
     }
     
-    # Check Azure Storage connection
-    storage_status = await _check_storage_connection()
-    health_status["services"]["storage"] = storage_status
+    return orjson.dumps(health_status), status_code
+
+
+async def _guarded_probe(service: str, probe) -> dict:
+    """
+    Run a health probe behind a timeout and a circuit breaker.
     
-    # Check Cosmos DB connection
-    cosmos_status = await _check_cosmos_connection()
-    health_status["services"]["cosmos"] = cosmos_status
+    If the probe exceeds its time budget, the circuit for that service opens
+    and, for HEALTH_CIRCUIT_OPEN_SECONDS, the service is reported unhealthy
+    without issuing a request.
     
-    # Determine overall health status
-    all_healthy = all(
-        service_status.get("healthy", False) 
-        for service_status in health_status["services"].values()
-    )
+    Until a service's probe has succeeded once, the budget is the larger
+    HEALTH_FIRST_PROBE_TIMEOUT_SECONDS: the first probes also build the SDK
+    clients and the Cosmos database and container, which can legitimately take
+    longer on a fresh instance (the warmup trigger doesn't run on Consumption
+    plans). After that, HEALTH_PROBE_TIMEOUT_SECONDS applies.
+    
+    Args:
+        service: Name of the service, used as the circuit key
+        probe: Coroutine function that checks the service
+        
+    Returns:
+        Dictionary with the service health status
+    """
+    if time.monotonic() < _circuit_open_until.get(service, 0.0):
+        return {"healthy": False, "error": "circuit_open"}
     
-    if not all_healthy:
-        health_status["status"] = "degraded"
-        status_code = 503  # Service Unavailable
+    if service in _probe_succeeded:
+        timeout = HEALTH_PROBE_TIMEOUT_SECONDS
     else:
-        status_code = 200
+        timeout = HEALTH_FIRST_PROBE_TIMEOUT_SECONDS
     
-    return func.HttpResponse(
-        body=json.dumps(health_status),
-        mimetype="application/json",
-        status_code=status_code
+    try:
+        status = await asyncio.wait_for(probe(), timeout=timeout)
+    except asyncio.TimeoutError:
+        _circuit_open_until[service] = time.monotonic() + HEALTH_CIRCUIT_OPEN_SECONDS
+        logger.error(
+            f"{service} health check timed out after {timeout}s; "
+            f"skipping probes for {HEALTH_CIRCUIT_OPEN_SECONDS}s"
+        )
+        return {"healthy": False, "error": "timeout"}
+    
+    if status.get("healthy"):
+        _probe_succeeded.add(service)
+    return status
+
+
+# Warmup trigger, invoked by the platform when a new instance is added
+# (Premium and Dedicated plans); builds the Blob and Cosmos clients and
+# completes their TLS handshakes and token acquisition before the instance
+# receives its first user request. The platform never calls it on the
+# Consumption (Y1) plan this repo deploys to by default, so there the first
+# request still pays for client setup.
+@app.warm_up_trigger(arg_name="warmup_context")
+async def warmup(warmup_context: func.warmup.WarmUpContext) -> None:
+    """
+    Warm up the Storage and Cosmos DB client paths used by the extended health check.
+    """
+    storage_status, cosmos_status = await asyncio.gather(
+        _check_storage_connection(),
+        _check_cosmos_connection(),
+        return_exceptions=True
     )
+    logger.info("Instance warmed up (storage: %s, cosmos: %s)", storage_status, cosmos_status)
+
+
+# Second-resolution ISO 8601 timestamp reused until the wall clock ticks over
+_ts_cache: tuple[int, str] = (0, "")
+
+
+def _cached_ts() -> str:
+    """
+    Returns the current UTC time as an ISO 8601 string, reformatted at most once per second.
+    """
+    global _ts_cache
+    now_s = int(time.time())
+    if now_s != _ts_cache[0]:
+        _ts_cache = (now_s, datetime.fromtimestamp(now_s, timezone.utc).isoformat())
+    return _ts_cache[1]
+
+
+# Singleton blob service client reused across health checks so repeated probes
+# share one connection pool instead of re-parsing the connection string and
+# re-negotiating TLS on every call
+_blob_service_client = None
+
+
+def _get_blob_service_client():
+    """
+    Gets or creates the singleton async BlobServiceClient from AzureWebJobsStorage.
+    
+    Creation is synchronous (no network I/O), so no lock is needed: nothing can
+    interleave between the check and the assignment on the event loop.
+    """
+    global _blob_service_client
+    if _blob_service_client is None:
+        logger.debug("Creating blob service client for health checks")
+        _blob_service_client = BlobServiceClient.from_connection_string(_STORAGE_CONNECTION)
+    return _blob_service_client
 
 
 async def _check_storage_connection() -> dict:
@@ -166,12 +327,8 @@ async def _check_storage_connection() -> dict:
         Dictionary with storage health status
     """
     try:
-        from azure.storage.blob.aio import BlobServiceClient
-        import os
-        
-        # Get connection string and container name from environment
-        connection_string = os.environ.get("AzureWebJobsStorage")
-        container_name = os.environ.get("INGESTION_CONTAINER", "snippet-inputs")
+        connection_string = _STORAGE_CONNECTION
+        container_name = _INGESTION_CONTAINER
         
         if not connection_string:
             return {
@@ -179,58 +336,96 @@ async def _check_storage_connection() -> dict:
                 "error": "AzureWebJobsStorage environment variable not found"
             }
         
-        # Create async blob service client
-        async with BlobServiceClient.from_connection_string(connection_string) as blob_client:
-            # Check if container exists and is accessible
-            container_client = blob_client.get_container_client(container_name)
-            
-            # This will raise an exception if container doesn't exist or is inaccessible
-            container_properties = await container_client.get_container_properties()
-            
-            logging.info(f"Storage health check: Container '{container_name}' is accessible")
-            
+        if BlobServiceClient is None:
             return {
-                "healthy": True,
-                "container": container_name,
-                "last_modified": container_properties.last_modified.isoformat() if container_properties.last_modified else None
+                "healthy": False,
+                "error": "Azure Storage SDK is not available"
             }
+        
+        # Reuse the cached async blob service client
+        blob_client = _get_blob_service_client()
+        
+        # Check if container exists and is accessible
+        container_client = blob_client.get_container_client(container_name)
+        
+        # This will raise an exception if container doesn't exist or is inaccessible
+        container_properties = await container_client.get_container_properties()
+        
+        logger.debug("Storage health check: Container '%s' is accessible", container_name)
+        
+        return {
+            "healthy": True,
+            "container": container_name,
+            "last_modified": container_properties.last_modified.isoformat() if container_properties.last_modified else None
+        }
             
     except Exception as e:
-        logging.error(f"Storage health check failed: {str(e)}")
+        logger.error(f"Storage health check failed: {str(e)}")
         return {
             "healthy": False,
             "error": str(e)
         }
 
 
+# Whether the container properties have been read once; later probes only
+# need to prove the data plane is reachable, not re-fetch the full container
+# definition (indexing and vector policies)
+_cosmos_container_verified = False
+
+# Item id used for the point-read probe; it is never written, so the read
+# costs a single 404 round trip
+_COSMOS_PROBE_ITEM_ID = "__health_probe__"
+
+
 async def _check_cosmos_connection() -> dict:
     """
     Check Cosmos DB connection and database/container accessibility.
     
+    The first successful probe reads the container properties and reports their
+    "last_modified" timestamp; later probes use a point read and omit it.
+    
     Returns:
         Dictionary with Cosmos DB health status
     """
+    global _cosmos_container_verified
     try:
         from data import cosmos_ops
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
         
         # Test getting the container (this will create client, database, and container if needed)
         container = await cosmos_ops.get_container()
         
-        # Perform a simple read operation to verify connection
-        container_properties = await container.read()
-        
-        logging.info(f"Cosmos health check: Database '{cosmos_ops.COSMOS_DATABASE_NAME}' and container '{cosmos_ops.COSMOS_CONTAINER_NAME}' are accessible")
-        
-        return {
+        cosmos_status = {
             "healthy": True,
             "database": cosmos_ops.COSMOS_DATABASE_NAME,
-            "container": cosmos_ops.COSMOS_CONTAINER_NAME,
-            "last_modified": container_properties.get("_ts")
+            "container": cosmos_ops.COSMOS_CONTAINER_NAME
         }
         
+        if not _cosmos_container_verified:
+            # First probe: read the full container properties once
+            container_properties = await container.read()
+            cosmos_status["last_modified"] = container_properties.get("_ts")
+            _cosmos_container_verified = True
+        else:
+            # Point read of a missing item: a 404 with sub-status 0 proves
+            # connectivity and auth; any other sub-status (e.g. 1003) means the
+            # container or database itself is gone
+            try:
+                await container.read_item(item=_COSMOS_PROBE_ITEM_ID, partition_key=_COSMOS_PROBE_ITEM_ID)
+            except CosmosResourceNotFoundError as e:
+                if e.sub_status:
+                    raise
+        
+        logger.debug(
+            "Cosmos health check: Database '%s' and container '%s' are accessible",
+            cosmos_ops.COSMOS_DATABASE_NAME, cosmos_ops.COSMOS_CONTAINER_NAME
+        )
+        
+        return cosmos_status
+        
     except Exception as e:
-        logging.error(f"Cosmos DB health check failed: {str(e)}")
+        logger.error(f"Cosmos DB health check failed: {str(e)}")
         return {
             "healthy": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
@@ -15,7 +15,7 @@ from urllib.parse import urlparse
 import azure.functions as func
 import azure.durable_functions as df
 
-from data import cosmos_ops
+from data import cosmos_ops, embedding_cache
 
 bp = func.Blueprint()
 
@@ -118,6 +118,11 @@ async def embed_chunk_activity(chunk : dict) -> list[float]:
         logging.warning("Missing OpenAI config, falling back to mock embedding")
         return [0.0, 1.0, 0.0]
 
+    # In-process cache only: the vector is persisted with the snippet itself
+    cached = await embedding_cache.get_embedding(text, model_name)
+    if cached:
+        return cached
+
     try:
         endpoint = f"https://{urlparse(conn).netloc}/models"
 
@@ -137,6 +142,7 @@ async def embed_chunk_activity(chunk : dict) -> list[float]:
                 raise ValueError("Failed to generate embedding.")
             
             query_vector = [float(x) for x in response.data[0].embedding]
+            await embedding_cache.put_embedding(text, model_name, query_vector)
             return query_vector
     except Exception as e:
         logging.error("Embedding failed: %s", e, exc_info=True)
@@ -2,14 +2,14 @@
 """
 Simple test to verify the upsert_document implementation is correct.
 """
-import asyncio
 import sys
 import os
+from inspect import CO_COROUTINE
 
 # Add src to path
 sys.path.insert(0, '/workspaces/snippy-ai-hackathon/src')
 
-async def test_upsert_function_signature():
+def test_upsert_function_signature():
     """Test that the upsert_document function is properly implemented."""
     try:
         from data import cosmos_ops
@@ -17,10 +17,9 @@ async def test_upsert_function_signature():
         # Check that the function exists
         assert hasattr(cosmos_ops, 'upsert_document'), "upsert_document function not found"
         
-        # Check function signature
-        import inspect
-        sig = inspect.signature(cosmos_ops.upsert_document)
-        params = list(sig.parameters.keys())
+        # Check function signature (read straight from the code object)
+        code = cosmos_ops.upsert_document.__code__
+        params = code.co_varnames[:code.co_argcount]
         
         # Check required parameters
         required_params = ['name', 'project_id', 'code', 'embedding']
@@ -35,7 +34,7 @@ async def test_upsert_function_signature():
         print("✅ Function signature is correct")
         
         # Check that the function is async
-        assert asyncio.iscoroutinefunction(cosmos_ops.upsert_document), "upsert_document should be async"
+        assert code.co_flags & CO_COROUTINE, "upsert_document should be async"
         print("✅ Function is properly async")
         
         # Try to create a mock document structure to verify internal logic
@@ -51,11 +50,11 @@ async def test_upsert_function_signature():
         print(f"❌ Test failed: {e}")
         return False
 
-async def main():
+def main():
     """Run the implementation test."""
     print("🔍 Testing upsert_document implementation...")
     
-    success = await test_upsert_function_signature()
+    success = test_upsert_function_signature()
     
     if success:
         print("\n✅ Level 3 implementation test PASSED")
@@ -71,5 +70,5 @@ async def main():
     return success
 
 if __name__ == "__main__":
-    result = asyncio.run(main())
+    result = main()
     sys.exit(0 if result else 1)
@@ -0,0 +1,82 @@
+import sys
+import pathlib
+import pytest
+from unittest.mock import AsyncMock
+
+# Ensure src is on path
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data import cosmos_ops, embedding_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_memory_cache", embedding_cache.OrderedDict())
+    monkeypatch.setattr(cosmos_ops, "get_cached_embedding", AsyncMock(return_value=None))
+    monkeypatch.setattr(cosmos_ops, "upsert_cached_embedding", AsyncMock())
+
+
+def test_code_keys_are_exact():
+    assert embedding_cache.cache_key("Foo", "m") != embedding_cache.cache_key("foo", "m")
+    assert embedding_cache.cache_key("if x:\n    y", "m") != embedding_cache.cache_key("if x:\n  y", "m")
+
+
+def test_query_keys_are_normalized():
+    key = embedding_cache.cache_key("  Find   HTTP handlers ", "m", normalize=True)
+    assert key == embedding_cache.cache_key("find http handlers", "m", normalize=True)
+
+
+@pytest.mark.asyncio
+async def test_code_chunks_do_not_share_vectors():
+    await embedding_cache.put_embedding("Foo = 1", "m", [1.0])
+    assert await embedding_cache.get_embedding("foo = 1", "m") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_SIZE", 2)
+    await embedding_cache.put_embedding("a", "m", [1.0])
+    await embedding_cache.put_embedding("b", "m", [2.0])
+    assert await embedding_cache.get_embedding("a", "m") == [1.0]  # "a" becomes most recent
+    await embedding_cache.put_embedding("c", "m", [3.0])
+
+    assert list(embedding_cache._memory_cache) == [
+        embedding_cache.cache_key("a", "m"),
+        embedding_cache.cache_key("c", "m"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cosmos_hit_fills_memory_cache(monkeypatch):
+    lookup = AsyncMock(return_value=[0.5, 0.5])
+    monkeypatch.setattr(cosmos_ops, "get_cached_embedding", lookup)
+
+    assert await embedding_cache.get_embedding("x", "m", shared=True) == [0.5, 0.5]
+    assert await embedding_cache.get_embedding("x", "m", shared=True) == [0.5, 0.5]
+    lookup.assert_awaited_once_with(embedding_cache.cache_key("x", "m"))
+
+
+@pytest.mark.asyncio
+async def test_cosmos_failure_is_a_miss(monkeypatch):
+    monkeypatch.setattr(cosmos_ops, "get_cached_embedding", AsyncMock(side_effect=RuntimeError("down")))
+    monkeypatch.setattr(cosmos_ops, "upsert_cached_embedding", AsyncMock(side_effect=RuntimeError("down")))
+
+    assert await embedding_cache.get_embedding("x", "m", shared=True) is None
+    await embedding_cache.put_embedding("x", "m", [1.0], shared=True)
+    assert await embedding_cache.get_embedding("x", "m", shared=True) == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_model_is_part_of_key():
+    assert embedding_cache.cache_key("x", "model-a") != embedding_cache.cache_key("x", "model-b")
+    await embedding_cache.put_embedding("x", "model-a", [1.0])
+    assert await embedding_cache.get_embedding("x", "model-b") is None
+
+
+@pytest.mark.asyncio
+async def test_unshared_calls_never_touch_cosmos():
+    await embedding_cache.put_embedding("def f(): pass", "m", [1.0])
+    assert await embedding_cache.get_embedding("def g(): pass", "m") is None
+
+    cosmos_ops.get_cached_embedding.assert_not_awaited()
+    cosmos_ops.upsert_cached_embedding.assert_not_awaited()
@@ -0,0 +1,169 @@
+import asyncio
+import sys
+import pathlib
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Ensure src is on path
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import function_app
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from data import cosmos_ops
+
+
+def _not_found(sub_status: int) -> CosmosResourceNotFoundError:
+    error = CosmosResourceNotFoundError(status_code=404, message="Not Found")
+    error.sub_status = sub_status
+    return error
+
+
+@pytest.fixture
+def fake_container(monkeypatch):
+    container = MagicMock()
+    container.read = AsyncMock(return_value={"_ts": 1700000000})
+    container.read_item = AsyncMock(side_effect=_not_found(0))
+    monkeypatch.setattr(cosmos_ops, "get_container", AsyncMock(return_value=container))
+    monkeypatch.setattr(function_app, "_cosmos_container_verified", False)
+    return container
+
+
+@pytest.mark.asyncio
+async def test_cosmos_probe_reads_container_once_then_point_reads(fake_container):
+    first = await function_app._check_cosmos_connection()
+    second = await function_app._check_cosmos_connection()
+
+    assert first["healthy"] and first["last_modified"] == 1700000000
+    assert second["healthy"] and "last_modified" not in second
+    fake_container.read.assert_awaited_once()
+    fake_container.read_item.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cosmos_probe_reports_missing_container(fake_container):
+    await function_app._check_cosmos_connection()
+    fake_container.read_item.side_effect = _not_found(1003)
+
+    status = await function_app._check_cosmos_connection()
+    assert status["healthy"] is False
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(function_app, "time", SimpleNamespace(monotonic=lambda: clock[0], time=time.time))
+    monkeypatch.setattr(function_app, "HEALTH_PROBE_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(function_app, "HEALTH_FIRST_PROBE_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(function_app, "HEALTH_CIRCUIT_OPEN_SECONDS", 30.0)
+    monkeypatch.setattr(function_app, "_circuit_open_until", {})
+    monkeypatch.setattr(function_app, "_probe_succeeded", set())
+    return clock
+
+
+async def _slow_probe():
+    await asyncio.sleep(0.05)
+    return {"healthy": True}
+
+
+async def _slow_failing_probe():
+    await asyncio.sleep(0.5)
+    return {"healthy": False, "error": "service unavailable"}
+
+
+@pytest.mark.asyncio
+async def test_slow_first_probe_gets_the_larger_budget(fake_clock):
+    status = await function_app._guarded_probe("storage", _slow_probe)
+
+    assert status == {"healthy": True}
+    assert function_app._circuit_open_until == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_failing_first_probe_opens_circuit(fake_clock):
+    status = await function_app._guarded_probe("cosmos", _slow_failing_probe)
+    assert status == {"healthy": False, "error": "timeout"}
+    assert "cosmos" not in function_app._probe_succeeded
+
+    probe = AsyncMock(return_value={"healthy": True})
+    assert await function_app._guarded_probe("cosmos", probe) == {"healthy": False, "error": "circuit_open"}
+    probe.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_skips_and_closes(fake_clock):
+    await function_app._guarded_probe("storage", AsyncMock(return_value={"healthy": True}))
+
+    # A timeout opens the circuit
+    status = await function_app._guarded_probe("storage", _slow_probe)
+    assert status == {"healthy": False, "error": "timeout"}
+
+    # While open, the probe is not issued
+    probe = AsyncMock(return_value={"healthy": True})
+    fake_clock[0] += 29
+    assert await function_app._guarded_probe("storage", probe) == {"healthy": False, "error": "circuit_open"}
+    probe.assert_not_awaited()
+
+    # Once the window passes, probing resumes
+    fake_clock[0] += 2
+    assert await function_app._guarded_probe("storage", probe) == {"healthy": True}
+    probe.assert_awaited_once()
+
+
+@pytest.fixture
+def counted_refresh(monkeypatch, fake_clock):
+    async def fake_run():
+        await asyncio.sleep(0.01)  # let concurrent callers queue on the lock
+        return b'{"status": "healthy"}', 200
+
+    run = AsyncMock(side_effect=fake_run)
+    monkeypatch.setattr(function_app, "_run_health_checks", run)
+    monkeypatch.setattr(function_app, "_last_health", None)
+    monkeypatch.setattr(function_app, "_health_refresh_lock", asyncio.Lock())
+    return run
+
+
+@pytest.mark.asyncio
+async def test_extended_health_refreshes_once_per_ttl_window(monkeypatch, fake_clock, counted_refresh):
+    monkeypatch.setattr(function_app, "HEALTH_TTL_SECONDS", 5.0)
+
+    responses = await asyncio.gather(*(function_app.http_health_check_extended(None) for _ in range(20)))
+    assert all(r.status_code == 200 for r in responses)
+    assert counted_refresh.await_count == 1
+
+    fake_clock[0] += 4
+    await function_app.http_health_check_extended(None)
+    assert counted_refresh.await_count == 1
+
+    fake_clock[0] += 2
+    await asyncio.gather(*(function_app.http_health_check_extended(None) for _ in range(20)))
+    assert counted_refresh.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_extended_health_ttl_zero_disables_caching(monkeypatch, fake_clock, counted_refresh):
+    monkeypatch.setattr(function_app, "HEALTH_TTL_SECONDS", 0.0)
+
+    for _ in range(3):
+        await function_app.http_health_check_extended(None)
+    assert counted_refresh.await_count == 3
+
+
+class _UnprintableError(Exception):
+    def __str__(self):
+        raise RuntimeError("boom")
+
+
+def test_error_response_falls_back_when_message_cannot_be_built():
+    response = function_app._health_error_response(_UnprintableError())
+
+    assert response.status_code == 500
+    assert response.get_body() == function_app._HEALTH_ERROR_BODY
+
+
+def test_error_response_includes_message():
+    response = function_app._health_error_response(ValueError("bad"))
+
+    assert response.status_code == 500
+    assert response.get_body() == b'{"status":"error","message":"bad"}'